@@ -1,3 +1,6 @@
+import importlib
+import sys
+
 import pkg_resources
 
 from .central import CentralMoments, central_moments
@@ -6,7 +9,24 @@ from .resample import (
     randsamp_freq,
     xbootstrap_confidence_interval,
 )
-from .xcentral import xcentral_moments, xCentralMoments
+
+# xarray is only imported when an xarray based object is requested.
+_XCENTRAL_NAMES = ("xcentral_moments", "xCentralMoments")
+
+if sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        if name == "xcentral":
+            return importlib.import_module("." + name, __name__)
+        if name in _XCENTRAL_NAMES:
+            from . import xcentral
+
+            return getattr(xcentral, name)
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+else:
+    from .xcentral import xcentral_moments, xCentralMoments  # noqa: F401
+
 
 try:
     __version__ = pkg_resources.get_distribution("cmomy").version
@@ -5,7 +5,6 @@ from __future__ import absolute_import
 
 from numba import njit, prange
 
-from .options import OPTIONS
 from .pushers import (
     _push_datas_scale,
     _push_datas_scale_cov,
@@ -16,13 +15,16 @@ from .pushers import (
     _push_vals_scale_cov_vec,
     _push_vals_scale_vec,
 )
+from .utils import _jit_kws, myjit
 
 # from functools import lru_cache
 # import numpy as np
 
 
 def jitter(parallel):
-    return njit(fastmath=OPTIONS["fastmath"], cache=OPTIONS["cache"], parallel=parallel)
+    # resampling only adds samples, so with non-negative weights the inlined
+    # pushers never divide by a zero total weight.  Drop the zero-division checks.
+    return njit(**_jit_kws(parallel=parallel, error_model="numpy"))
 
 
 # NOTE: this is all due to closures not being cache-able with numba
@@ -59,66 +61,121 @@ def jitter(parallel):
 
 #     return resample
 
+######################################################################
+# Samples are processed in blocks of about `_RESAMPLE_BLOCK_BYTES`, but at
+# least `_RESAMPLE_MIN_BLOCK` samples. Serial kernels update all replicates
+# from each block while it is in cache, rather than streaming all samples once
+# per replicate. Parallel kernels split replicates over threads, and each
+# thread walks the blocks, so the thread team is started only once.
+_RESAMPLE_BLOCK_BYTES = 262144
+_RESAMPLE_MIN_BLOCK = 64
+
+
+@myjit
+def _block_size(nbytes_per_sample):
+    return max(_RESAMPLE_MIN_BLOCK, _RESAMPLE_BLOCK_BYTES // max(1, nbytes_per_sample))
+
+
 ######################################################################
 # resample data
 # mom/scalar
 @jitter(parallel=False)
 def _resample_data(data, freq, out):
-    nrep = freq.shape[0]
-    for irep in prange(nrep):
-        _push_datas_scale(out[irep, ...], data, freq[irep, ...])
+    nrep, ndat = freq.shape
+    nblock = _block_size(data.size // max(1, ndat) * data.itemsize)
+    for start in range(0, ndat, nblock):
+        end = min(start + nblock, ndat)
+        for irep in prange(nrep):
+            _push_datas_scale(
+                out[irep, ...], data[start:end, ...], freq[irep, start:end]
+            )
 
 
 @jitter(parallel=True)
 def _resample_data_parallel(data, freq, out):
-    nrep = freq.shape[0]
+    nrep, ndat = freq.shape
+    nblock = _block_size(data.size // max(1, ndat) * data.itemsize)
     for irep in prange(nrep):
-        _push_datas_scale(out[irep, ...], data, freq[irep, ...])
+        for start in range(0, ndat, nblock):
+            end = min(start + nblock, ndat)
+            _push_datas_scale(
+                out[irep, ...], data[start:end, ...], freq[irep, start:end]
+            )
 
 
 # mom/vector
 @jitter(parallel=False)
 def _resample_data_vec(data, freq, out):
-    nrep = freq.shape[0]
-    for irep in prange(nrep):
-        _push_datas_scale_vec(out[irep, ...], data, freq[irep, ...])
+    nrep, ndat = freq.shape
+    nblock = _block_size(data.size // max(1, ndat) * data.itemsize)
+    for start in range(0, ndat, nblock):
+        end = min(start + nblock, ndat)
+        for irep in prange(nrep):
+            _push_datas_scale_vec(
+                out[irep, ...], data[start:end, ...], freq[irep, start:end]
+            )
 
 
 @jitter(parallel=True)
 def _resample_data_vec_parallel(data, freq, out):
-    nrep = freq.shape[0]
+    nrep, ndat = freq.shape
+    nblock = _block_size(data.size // max(1, ndat) * data.itemsize)
     for irep in prange(nrep):
-        _push_datas_scale_vec(out[irep, ...], data, freq[irep, ...])
+        for start in range(0, ndat, nblock):
+            end = min(start + nblock, ndat)
+            _push_datas_scale_vec(
+                out[irep, ...], data[start:end, ...], freq[irep, start:end]
+            )
 
 
 # cov/vector
 @jitter(parallel=False)
 def _resample_data_cov(data, freq, out):
-    nrep = freq.shape[0]
-    for irep in prange(nrep):
-        _push_datas_scale_cov(out[irep, ...], data, freq[irep, ...])
+    nrep, ndat = freq.shape
+    nblock = _block_size(data.size // max(1, ndat) * data.itemsize)
+    for start in range(0, ndat, nblock):
+        end = min(start + nblock, ndat)
+        for irep in prange(nrep):
+            _push_datas_scale_cov(
+                out[irep, ...], data[start:end, ...], freq[irep, start:end]
+            )
 
 
 @jitter(parallel=True)
 def _resample_data_cov_parallel(data, freq, out):
-    nrep = freq.shape[0]
+    nrep, ndat = freq.shape
+    nblock = _block_size(data.size // max(1, ndat) * data.itemsize)
     for irep in prange(nrep):
-        _push_datas_scale_cov(out[irep, ...], data, freq[irep, ...])
+        for start in range(0, ndat, nblock):
+            end = min(start + nblock, ndat)
+            _push_datas_scale_cov(
+                out[irep, ...], data[start:end, ...], freq[irep, start:end]
+            )
 
 
 # cov/vector
 @jitter(parallel=False)
 def _resample_data_cov_vec(data, freq, out):
-    nrep = freq.shape[0]
-    for irep in prange(nrep):
-        _push_datas_scale_cov_vec(out[irep, ...], data, freq[irep, ...])
+    nrep, ndat = freq.shape
+    nblock = _block_size(data.size // max(1, ndat) * data.itemsize)
+    for start in range(0, ndat, nblock):
+        end = min(start + nblock, ndat)
+        for irep in prange(nrep):
+            _push_datas_scale_cov_vec(
+                out[irep, ...], data[start:end, ...], freq[irep, start:end]
+            )
 
 
 @jitter(parallel=True)
 def _resample_data_cov_vec_parallel(data, freq, out):
-    nrep = freq.shape[0]
+    nrep, ndat = freq.shape
+    nblock = _block_size(data.size // max(1, ndat) * data.itemsize)
     for irep in prange(nrep):
-        _push_datas_scale_cov_vec(out[irep, ...], data, freq[irep, ...])
+        for start in range(0, ndat, nblock):
+            end = min(start + nblock, ndat)
+            _push_datas_scale_cov_vec(
+                out[irep, ...], data[start:end, ...], freq[irep, start:end]
+            )
 
 
 _RESAMPLE_DATA_DICT = {
@@ -145,61 +202,117 @@ def factory_resample_data(cov, vec, parallel):
 # mom/scalar
 @jitter(parallel=False)
 def _resample_vals(W, X, freq, out):
-    nrep = freq.shape[0]
-    for irep in prange(nrep):
-        _push_vals_scale(out[irep, ...], W, X, freq[irep, ...])
+    nrep, ndat = freq.shape
+    nblock = _block_size(2 * W.size // max(1, ndat) * W.itemsize)
+    for start in range(0, ndat, nblock):
+        end = min(start + nblock, ndat)
+        for irep in prange(nrep):
+            _push_vals_scale(
+                out[irep, ...], W[start:end], X[start:end], freq[irep, start:end]
+            )
 
 
 @jitter(parallel=True)
 def _resample_vals_parallel(W, X, freq, out):
-    nrep = freq.shape[0]
+    nrep, ndat = freq.shape
+    nblock = _block_size(2 * W.size // max(1, ndat) * W.itemsize)
     for irep in prange(nrep):
-        _push_vals_scale(out[irep, ...], W, X, freq[irep, ...])
+        for start in range(0, ndat, nblock):
+            end = min(start + nblock, ndat)
+            _push_vals_scale(
+                out[irep, ...], W[start:end], X[start:end], freq[irep, start:end]
+            )
 
 
 # mom/vec
 @jitter(parallel=False)
 def _resample_vals_vec(W, X, freq, out):
-    nrep = freq.shape[0]
-    for irep in prange(nrep):
-        _push_vals_scale_vec(out[irep, ...], W, X, freq[irep, ...])
+    nrep, ndat = freq.shape
+    nblock = _block_size(2 * W.size // max(1, ndat) * W.itemsize)
+    for start in range(0, ndat, nblock):
+        end = min(start + nblock, ndat)
+        for irep in prange(nrep):
+            _push_vals_scale_vec(
+                out[irep, ...], W[start:end], X[start:end], freq[irep, start:end]
+            )
 
 
 @jitter(parallel=True)
 def _resample_vals_vec_parallel(W, X, freq, out):
-    nrep = freq.shape[0]
+    nrep, ndat = freq.shape
+    nblock = _block_size(2 * W.size // max(1, ndat) * W.itemsize)
     for irep in prange(nrep):
-        _push_vals_scale_vec(out[irep, ...], W, X, freq[irep, ...])
+        for start in range(0, ndat, nblock):
+            end = min(start + nblock, ndat)
+            _push_vals_scale_vec(
+                out[irep, ...], W[start:end], X[start:end], freq[irep, start:end]
+            )
 
 
 # cov/scalar
 @jitter(parallel=False)
 def _resample_vals_cov(W, X, Y, freq, out):
-    nrep = freq.shape[0]
-    for irep in prange(nrep):
-        _push_vals_scale_cov(out[irep, ...], W, X, Y, freq[irep, ...])
+    nrep, ndat = freq.shape
+    nblock = _block_size(3 * W.size // max(1, ndat) * W.itemsize)
+    for start in range(0, ndat, nblock):
+        end = min(start + nblock, ndat)
+        for irep in prange(nrep):
+            _push_vals_scale_cov(
+                out[irep, ...],
+                W[start:end],
+                X[start:end],
+                Y[start:end],
+                freq[irep, start:end],
+            )
 
 
 @jitter(parallel=True)
 def _resample_vals_cov_parallel(W, X, Y, freq, out):
-    nrep = freq.shape[0]
+    nrep, ndat = freq.shape
+    nblock = _block_size(3 * W.size // max(1, ndat) * W.itemsize)
     for irep in prange(nrep):
-        _push_vals_scale_cov(out[irep, ...], W, X, Y, freq[irep, ...])
+        for start in range(0, ndat, nblock):
+            end = min(start + nblock, ndat)
+            _push_vals_scale_cov(
+                out[irep, ...],
+                W[start:end],
+                X[start:end],
+                Y[start:end],
+                freq[irep, start:end],
+            )
 
 
 # cov/vec
 @jitter(parallel=False)
 def _resample_vals_cov_vec(W, X, Y, freq, out):
-    nrep = freq.shape[0]
-    for irep in prange(nrep):
-        _push_vals_scale_cov_vec(out[irep, ...], W, X, Y, freq[irep, ...])
+    nrep, ndat = freq.shape
+    nblock = _block_size(3 * W.size // max(1, ndat) * W.itemsize)
+    for start in range(0, ndat, nblock):
+        end = min(start + nblock, ndat)
+        for irep in prange(nrep):
+            _push_vals_scale_cov_vec(
+                out[irep, ...],
+                W[start:end],
+                X[start:end],
+                Y[start:end],
+                freq[irep, start:end],
+            )
 
 
 @jitter(parallel=True)
 def _resample_vals_cov_vec_parallel(W, X, Y, freq, out):
-    nrep = freq.shape[0]
+    nrep, ndat = freq.shape
+    nblock = _block_size(3 * W.size // max(1, ndat) * W.itemsize)
     for irep in prange(nrep):
-        _push_vals_scale_cov_vec(out[irep, ...], W, X, Y, freq[irep, ...])
+        for start in range(0, ndat, nblock):
+            end = min(start + nblock, ndat)
+            _push_vals_scale_cov_vec(
+                out[irep, ...],
+                W[start:end],
+                X[start:end],
+                Y[start:end],
+                freq[irep, start:end],
+            )
 
 
 _RESAMPLE_VALS_DICT = {
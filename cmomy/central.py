@@ -3,20 +3,50 @@ Central moments/comoments routines
 """
 from __future__ import absolute_import
 
+import warnings
+
 import numpy as np
 from numpy.core.numeric import normalize_axis_index  # , normalize_axis_tuple
 
 from . import convert
 from .cached_decorators import gcached
 from .pushers import factory_pushers
-from .resample import randsamp_freq, resample_data, resample_vals
+from .resample import (
+    RESAMPLE_WARN_NBYTES,
+    RESAMPLE_WARN_RATIO,
+    PerformanceWarning,
+    randsamp_freq,
+    resample_data,
+    resample_vals,
+)
 from .utils import _axis_expand_broadcast  # _cached_ones,; _my_broadcast,
-from .utils import _shape_insert_axis, _shape_reduce
+from .utils import (
+    _asarray_c,
+    _mom_shape,
+    _prod,
+    _shape_insert_axis,
+    _shape_reduce,
+    _validate_mom,
+    _wrap_axes,
+)
 
 
 ###############################################################################
 # central mom/comoments routines
 ###############################################################################
+def _powers(dx, n):
+    """
+    powers `dx**i` for `i=0,...,n` stacked along first axis
+
+    Built by repeated multiplication rather than calls to `pow`.
+    """
+    out = np.empty((n + 1,) + dx.shape, dtype=dx.dtype)
+    out[0, ...] = 1.0
+    for i in range(1, n + 1):
+        np.multiply(out[i - 1], dx, out=out[i])
+    return out
+
+
 def _central_moments(
     x, mom, w=None, axis=0, last=True, dtype=None, order=None, out=None
 ):
@@ -29,9 +59,8 @@ def _central_moments(
     if dtype is None:
         dtype = x.dtype
 
-    if w is None:
-        w = np.ones_like(x)
-    else:
+    # unit weights are never materialized
+    if w is not None:
         w = _axis_expand_broadcast(
             w, x.shape, axis, roll=False, dtype=dtype, order=order
         )
@@ -40,7 +69,8 @@ def _central_moments(
     #     axis += x.ndim
     if axis != 0:
         x = np.moveaxis(x, axis, 0)
-        w = np.moveaxis(w, axis, 0)
+        if w is not None:
+            w = np.moveaxis(w, axis, 0)
 
     shape = (mom + 1,) + x.shape[1:]
     if out is None:
@@ -51,18 +81,24 @@ def _central_moments(
             out = np.moveaxis(out, -1, 0)
         assert out.shape == shape
 
-    wsum = w.sum(axis=0)
-    wsum_inv = 1.0 / wsum
-    xave = np.einsum("r...,r...->...", w, x) * wsum_inv
-
-    shape = (-1,) + (1,) * (x.ndim)
-    p = np.arange(2, mom + 1).reshape(*shape)
+    if w is None:
+        wsum = x.shape[0]
+        wsum_inv = 1.0 / wsum
+        xave = x.sum(axis=0) * wsum_inv
+    else:
+        wsum = w.sum(axis=0)
+        wsum_inv = 1.0 / wsum
+        xave = np.einsum("r...,r...->...", w, x) * wsum_inv
 
-    dx = (x[None, ...] - xave) ** p
+    # running product w * dx**m, one multiply per moment
+    dx = x - xave
+    wdx = dx.copy() if w is None else w * dx
+    for m in range(2, mom + 1):
+        wdx *= dx
+        out[m, ...] = wdx.sum(axis=0) * wsum_inv
 
     out[0, ...] = wsum
     out[1, ...] = xave
-    out[2:, ...] = np.einsum("r..., mr...->m...", w, dx) * wsum_inv
 
     if last:
         out = np.moveaxis(out, 0, -1)
@@ -107,14 +143,12 @@ def _central_comoments(
         order=order,
     )
 
-    if w is None:
-        w = np.ones_like(x)
-    else:
+    # unit weights are never materialized
+    if w is not None:
         w = _axis_expand_broadcast(
             w, x.shape, axis, roll=False, dtype=dtype, order=order
         )
-
-    assert w.shape == x.shape
+        assert w.shape == x.shape
     assert y.shape == x.shape
 
     # if axis < 0:
@@ -122,9 +156,10 @@ def _central_comoments(
     if axis != 0:
         x = np.moveaxis(x, axis, 0)
         y = np.moveaxis(y, axis, 0)
-        w = np.moveaxis(w, axis, 0)
+        if w is not None:
+            w = np.moveaxis(w, axis, 0)
 
-    shape = tuple(x + 1 for x in mom) + x.shape[1:]
+    shape = _mom_shape(mom) + x.shape[1:]
     if out is None:
         out = np.empty(shape, dtype=dtype)
     else:
@@ -133,20 +168,24 @@ def _central_comoments(
             out = np.moveaxis(out, [-2, -1], [0, 1])
         assert out.shape == shape
 
-    wsum = w.sum(axis=0)
-    wsum_inv = 1.0 / wsum
-
-    xave = np.einsum("r...,r...->...", w, x) * wsum_inv
-    yave = np.einsum("r...,r...->...", w, y) * wsum_inv
-
-    shape = (-1,) + (1,) * (x.ndim)
-    p0 = np.arange(0, mom[0] + 1).reshape(*shape)
-    p1 = np.arange(0, mom[1] + 1).reshape(*shape)
+    if w is None:
+        wsum = x.shape[0]
+        wsum_inv = 1.0 / wsum
+        xave = x.sum(axis=0) * wsum_inv
+        yave = y.sum(axis=0) * wsum_inv
+    else:
+        wsum = w.sum(axis=0)
+        wsum_inv = 1.0 / wsum
+        xave = np.einsum("r...,r...->...", w, x) * wsum_inv
+        yave = np.einsum("r...,r...->...", w, y) * wsum_inv
 
-    dx = (x[None, ...] - xave) ** p0
-    dy = (y[None, ...] - yave) ** p1
+    dx = _powers(x - xave, mom[0])
+    dy = _powers(y - yave, mom[1])
 
-    out[...] = np.einsum("r...,ir...,jr...->ij...", w, dx, dy) * wsum_inv
+    if w is None:
+        out[...] = np.einsum("ir...,jr...->ij...", dx, dy) * wsum_inv
+    else:
+        out[...] = np.einsum("r...,ir...,jr...->ij...", w, dx, dy) * wsum_inv
 
     out[0, 0, ...] = wsum
     out[1, 0, ...] = xave
@@ -265,7 +304,7 @@ class CentralMoments(object):
 
         self._data_flat = self._data.reshape(self.shape_flat)
 
-        if any(m <= 0 for m in self.mom):
+        if min(self.mom) <= 0:
             raise ValueError("moments must be positive")
 
         # setup pushers
@@ -273,6 +312,14 @@ class CentralMoments(object):
         cov = self.mom_ndim == 2
         self._push = factory_pushers(cov=cov, vec=vec)
 
+    def _get_pusher(self, parallel=False):
+        """pushers to use"""
+        if parallel:
+            return factory_pushers(
+                cov=self.mom_ndim == 2, vec=len(self.val_shape) > 0, parallel=True
+            )
+        return self._push
+
     @property
     def values(self):
         """accessor to underlying central moments data"""
@@ -339,7 +386,7 @@ class CentralMoments(object):
         if self.val_shape == ():
             return ()
         else:
-            return (np.prod(self.val_shape),)
+            return (_prod(self.val_shape),)
 
     @property
     def shape_flat(self):
@@ -440,6 +487,10 @@ class CentralMoments(object):
         """create new object empty object like self"""
         return self.new_like()
 
+    def astype(self, dtype, copy=True):
+        """create new object with data cast to `dtype`"""
+        return self.new_like(data=self._data.astype(dtype, copy=copy), copy=False)
+
     def copy(self, **copy_kws):
         """create a new object with copy of data"""
         return self.new_like(
@@ -494,17 +545,15 @@ class CentralMoments(object):
 
         if shape is None:
             assert mom is not None
-            if isinstance(mom, int):
-                mom = (mom,)
-            if mom_ndim is None:
-                mom_ndim = len(mom)
-            assert len(mom) == mom_ndim
+            # skip validation of moments already validated by caller
+            if not (type(mom) is tuple and len(mom) == mom_ndim):
+                mom, mom_ndim = _validate_mom(mom, mom_ndim)
 
             if val_shape is None:
                 val_shape = ()
             elif isinstance(val_shape, int):
                 val_shape = (val_shape,)
-            shape = val_shape + tuple(x + 1 for x in mom)
+            shape = val_shape + _mom_shape(mom)
 
         else:
             assert mom_ndim is not None
@@ -788,7 +837,7 @@ class CentralMoments(object):
         self._push.data(self._data_flat, data)
         return self
 
-    def push_datas(self, datas, axis=0):
+    def push_datas(self, datas, axis=0, parallel=False):
         """push and reduce multiple average central moments
 
         Parameters
@@ -798,13 +847,16 @@ class CentralMoments(object):
             if `axis=0`, where `nrec` is the number of data objects to sum.
         axis : int, default=0
             axis to reduce along
+        parallel : bool, default=False
+            If True, reduce in parallel.  Vector data is split over values, scalar
+            data over chunks of samples.
 
         Returns
         -------
         self
         """
         datas = self._check_datas(datas, axis)
-        self._push.datas(self._data_flat, datas)
+        self._get_pusher(parallel).datas(self._data_flat, datas)
         return self
 
     def push_val(self, x, w=None, broadcast=False):
@@ -839,7 +891,7 @@ class CentralMoments(object):
         self._push.val(self._data_flat, *((wr, xr) + yr))
         return self
 
-    def push_vals(self, x, w=None, axis=0, broadcast=False):
+    def push_vals(self, x, w=None, axis=0, broadcast=False, parallel=False):
         """
         add multiple samples to central moments
 
@@ -856,6 +908,9 @@ class CentralMoments(object):
             axis to reduce along
         broadcast : bool, default = False
             If true, do smart broadcasting for `x[1:]`
+        parallel : bool, default=False
+            If True, reduce in parallel.  Vector data is split over values, scalar
+            data over chunks of samples.
         """
         if self.mom_ndim == 1:
             ys = ()
@@ -869,7 +924,7 @@ class CentralMoments(object):
             for y in ys
         )
         wr = self._check_weights(w, target=target, axis=axis)
-        self._push.vals(self._data_flat, *((wr, xr) + yr))
+        self._get_pusher(parallel).vals(self._data_flat, *((wr, xr) + yr))
         return self
 
     ###########################################################################
@@ -877,7 +932,7 @@ class CentralMoments(object):
     ###########################################################################
     def _check_other(self, b):
         """check other object"""
-        assert type(self) == type(b)
+        assert type(self) is type(b)
         assert self.mom_ndim == b.mom_ndim
         assert self.shape == b.shape
 
@@ -944,22 +999,17 @@ class CentralMoments(object):
                     raise ValueError(
                         "must speficy either moments or shape and mom_ndim"
                     )
-                moments = tuple(x - 1 for x in shape[-mom_ndim:])
+                if mom_ndim == 1:
+                    moments = (shape[-1] - 1,)
+                else:
+                    moments = (shape[-2] - 1, shape[-1] - 1)
+                if min(moments) <= 0:
+                    raise ValueError("moments must be positive")
+                return moments
             else:
                 raise ValueError("must specify moments")
 
-        if isinstance(moments, int):
-            if mom_ndim is None:
-                mom_ndim = 1
-            moments = (moments,) * mom_ndim
-
-        else:
-            moments = tuple(moments)
-            if mom_ndim is None:
-                mom_ndim = len(moments)
-
-        assert len(moments) == mom_ndim
-        return moments
+        return _validate_mom(moments, mom_ndim)[0]
 
     @staticmethod
     def _datas_axis_to_first(datas, axis, mom_ndim):
@@ -988,9 +1038,20 @@ class CentralMoments(object):
         # assert 0 <= axis < ndim
         return axis
 
+    def _wrap_axes(self, axes, ndim=None):
+        """wrap tuple of axes to positive values and check"""
+        if ndim is None:
+            ndim = self.val_ndim
+        return _wrap_axes(axes, ndim)
+
     @classmethod
     def _mom_ndim_from_mom(cls, mom):
-        if isinstance(mom, int):
+        t = type(mom)
+        if t is int:
+            return 1
+        elif t is tuple:
+            return len(mom)
+        elif isinstance(mom, int):
             return 1
         elif isinstance(mom, tuple):
             return len(mom)
@@ -1031,7 +1092,7 @@ class CentralMoments(object):
         mom_ndim = cls._choose_mom_ndim(mom, mom_ndim)
 
         if verify:
-            data_verified = np.asarray(data, dtype=dtype, order="c")
+            data_verified = _asarray_c(data, dtype=dtype)
         else:
             data_verified = data
 
@@ -1040,7 +1101,7 @@ class CentralMoments(object):
                 val_shape = data_verified.shape[:-mom_ndim]
             mom = cls._check_mom(mom, mom_ndim, data_verified.shape)
 
-            if data_verified.shape != val_shape + tuple(x + 1 for x in mom):
+            if data_verified.shape != val_shape + _mom_shape(mom):
                 raise ValueError(
                     f"{data.shape} does not conform to {val_shape} and {mom}"
                 )
@@ -1063,6 +1124,7 @@ class CentralMoments(object):
         dtype=None,
         verify=True,
         check_shape=True,
+        parallel=False,
         **kws,
     ):
         """
@@ -1071,6 +1133,8 @@ class CentralMoments(object):
         [..., moments] (axis!= -1)
 
         [..., moment, axis] (axis == -1)
+
+        If `parallel` is True, reduce in parallel (see `push_datas`).
         """
 
         mom_ndim = cls._choose_mom_ndim(mom, mom_ndim)
@@ -1083,14 +1147,14 @@ class CentralMoments(object):
                 val_shape = datas.shape[1:-mom_ndim]
 
             mom = cls._check_mom(mom, mom_ndim, datas.shape)
-            assert datas.shape[1:] == val_shape + tuple(x + 1 for x in mom)
+            assert datas.shape[1:] == val_shape + _mom_shape(mom)
 
         if dtype is None:
             dtype = datas.dtype
 
         return cls.zeros(
             shape=datas.shape[1:], mom_ndim=mom_ndim, dtype=dtype, **kws
-        ).push_datas(datas=datas, axis=0)
+        ).push_datas(datas=datas, axis=0, parallel=parallel)
 
     @classmethod
     def from_vals(
@@ -1102,19 +1166,20 @@ class CentralMoments(object):
         val_shape=None,
         dtype=None,
         broadcast=False,
+        parallel=False,
         **kws,
     ):
 
-        mom_ndim = cls._mom_ndim_from_mom(mom)
+        mom, mom_ndim = _validate_mom(mom)
         x0 = x if mom_ndim == 1 else x[0]
         if val_shape is None:
             val_shape = _shape_reduce(x0.shape, axis)
         if dtype is None:
             dtype = x0.dtype
 
-        return cls.zeros(val_shape=val_shape, mom=mom, dtype=dtype, **kws).push_vals(
-            x=x, axis=axis, w=w, broadcast=broadcast
-        )
+        return cls.zeros(
+            val_shape=val_shape, mom=mom, mom_ndim=mom_ndim, dtype=dtype, **kws
+        ).push_vals(x=x, axis=axis, w=w, broadcast=broadcast, parallel=parallel)
 
     @classmethod
     def from_resample_vals(
@@ -1265,6 +1330,7 @@ class CentralMoments(object):
         nrep=None,
         axis=None,
         parallel=True,
+        dtype=None,
         resample_kws=None,
         **kws,
     ):
@@ -1284,6 +1350,9 @@ class CentralMoments(object):
             axis to resample and reduce along
         parallel : bool, default=True
             flags to `numba.njit`
+        dtype : numpy dtype, optional
+            dtype used for accumulation and output.  Defaults to `self.dtype`.
+            Use `numpy.float32` to halve the memory moved for large arrays.
         resample_kws : dict
             extra arguments to `cmomy.resample.resample_and_reduce`
         kws : dict
@@ -1298,11 +1367,17 @@ class CentralMoments(object):
             nrep=nrep, indices=indices, freq=freq, size=self.val_shape[axis], check=True
         )
         data = resample_data(
-            self.data, freq, mom=self.mom, axis=axis, parallel=parallel, **resample_kws
+            self.data,
+            freq,
+            mom=self.mom,
+            axis=axis,
+            parallel=parallel,
+            dtype=dtype,
+            **resample_kws,
         )
         return type(self).from_data(data, mom_ndim=self.mom_ndim, copy=False, **kws)
 
-    def resample(self, indices, axis=0, first=True, **kws):
+    def resample(self, indices, axis=0, first=True, reduce=False, **kws):
         """
         create a new object sampled from index
 
@@ -1315,14 +1390,39 @@ class CentralMoments(object):
             if True, and axis != 0, the move the axis to first position.
             This makes results similar to resample and reduce
             If `first` False, then resampled array can have odd shape
+        reduce : bool, default=False
+            if True, return result of `self.resample_and_reduce`.
+            This avoids creating the intermediate array of shape
+            `indices.shape + self.shape` (less axis) that `resample(...).reduce(...)`
+            requires.
 
         Returns
         -------
         output : accumulator object
+
+        Notes
+        -----
+        A `PerformanceWarning` is emitted if the resampled data is more than
+        `RESAMPLE_WARN_RATIO` times larger than the original data along `axis`,
+        and larger than `RESAMPLE_WARN_NBYTES` bytes.
         """
         self._raise_if_scalar()
         axis = self._wrap_axis(axis)
 
+        if reduce:
+            return self.resample_and_reduce(indices=indices, axis=axis, **kws)
+
+        indices = np.asarray(indices)
+        ratio = indices.size / self.val_shape[axis]
+        nbytes = ratio * self.data.nbytes
+        if ratio > RESAMPLE_WARN_RATIO and nbytes > RESAMPLE_WARN_NBYTES:
+            warnings.warn(
+                f"resample creates a {ratio:.0f}x intermediate of {nbytes:.3g} bytes. "
+                "Use resample_and_reduce (or reduce=True) to avoid this.",
+                PerformanceWarning,
+                stacklevel=2,
+            )
+
         data = self.data
         if first and axis != 0:
             data = np.moveaxis(data, axis, 0)
@@ -1339,14 +1439,25 @@ class CentralMoments(object):
             **kws,
         )
 
-    def reduce(self, axis=0, **kws):
+    def reduce(self, axis=0, dtype=None, **kws):
         """
         create new object reducealong axis
+
+        Parameters
+        ----------
+        axis : int, default=0
+            axis to reduce along
+        dtype : numpy dtype, optional
+            dtype used for accumulation and output.  Defaults to `self.dtype`.
+            To accumulate in float64 but store float32, use
+            `self.reduce(dtype=np.float64).astype(np.float32)`.
+        kws : dict
+            extra key-word arguments to `from_datas` method
         """
         self._raise_if_scalar()
         axis = self._wrap_axis(axis)
         return type(self).from_datas(
-            self.values, mom_ndim=self.mom_ndim, axis=axis, **kws
+            self.values, mom_ndim=self.mom_ndim, axis=axis, dtype=dtype, **kws
         )
 
     def block(self, block_size=None, axis=None, **kws):
@@ -1422,11 +1533,11 @@ class CentralMoments(object):
         self._raise_if_scalar()
 
         def __check_val(v):
-            if isinstance(v, int):
+            if isinstance(v, (int, str)):
                 v = (v,)
             else:
                 v = tuple(v)
-            return tuple(self._wrap_axis(x) for x in v)
+            return self._wrap_axes(v)
 
         source = __check_val(source)
         destination = __check_val(destination)
@@ -1463,13 +1574,13 @@ class CentralMoments(object):
         self._push.stat(self._data_flat, wr, ar, vr)
         return self
 
-    def push_stats(self, a, v=0.0, w=None, axis=0, broadcast=True):
+    def push_stats(self, a, v=0.0, w=None, axis=0, broadcast=True, parallel=False):
         self._raise_if_not_1d(self.mom_ndim)
 
         ar, target = self._check_vals(a, target="vals", axis=axis)
         vr = self._check_vars(v, target=target, axis=axis, broadcast=broadcast)
         wr = self._check_weights(w, target=target, axis=axis)
-        self._push.stats(self._data_flat, wr, ar, vr)
+        self._get_pusher(parallel).stats(self._data_flat, wr, ar, vr)
         return self
 
     @classmethod
@@ -1477,7 +1588,7 @@ class CentralMoments(object):
         """
         object from single weight, average, variance/covariance
         """
-        mom_ndim = cls._mom_ndim_from_mom(mom)
+        mom, mom_ndim = _validate_mom(mom)
         cls._raise_if_not_1d(mom_ndim)
 
         if val_shape is None:
@@ -1485,9 +1596,9 @@ class CentralMoments(object):
         if dtype is None:
             dtype = a.dtype
 
-        return cls.zeros(val_shape=val_shape, mom=mom, dtype=dtype, **kws).push_stat(
-            w=w, a=a, v=v
-        )
+        return cls.zeros(
+            val_shape=val_shape, mom=mom, mom_ndim=mom_ndim, dtype=dtype, **kws
+        ).push_stat(w=w, a=a, v=v)
 
     @classmethod
     def from_stats(
@@ -1505,12 +1616,12 @@ class CentralMoments(object):
         object from several weights, averages, variances/covarainces along axis
         """
 
-        mom_ndim = cls._mom_ndim_from_mom(mom)
+        mom, mom_ndim = _validate_mom(mom)
         cls._raise_if_not_1d(mom_ndim)
 
         # get val_shape
         if val_shape is None:
             val_shape = _shape_reduce(a.shape, axis)
-        return cls.zeros(val_shape=val_shape, dtype=dtype, mom=mom, **kws).push_stats(
-            a=a, v=v, w=w, axis=axis
-        )
+        return cls.zeros(
+            val_shape=val_shape, dtype=dtype, mom=mom, mom_ndim=mom_ndim, **kws
+        ).push_stats(a=a, v=v, w=w, axis=axis)
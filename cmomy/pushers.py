@@ -5,8 +5,11 @@ from __future__ import absolute_import
 
 from collections import namedtuple
 
+import numpy as np
+from numba import prange
+
 from .options import OPTIONS
-from .utils import factory_binomial, myjit
+from .utils import factory_binomial, myjit, myjit_parallel
 
 # from functools import lru_cache
 
@@ -63,8 +66,40 @@ def _push_val(data, w, x):
     data[2] = one_alpha * (data[2] + delta * incr)
 
 
+@myjit
+def _push_vals_order2(data, W, X):
+    """
+    push values for `order == 2`, with moments held in locals
+
+    `data` is only read and written once, rather than once per sample.
+    """
+    w_sum = data[0]
+    m1 = data[1]
+    m2 = data[2]
+
+    ns = X.shape[0]
+    for s in range(ns):
+        w = W[s]
+        if w == 0.0:
+            continue
+        w_sum += w
+        alpha = w / w_sum
+        delta = X[s] - m1
+        incr = delta * alpha
+        m1 += incr
+        m2 = (1.0 - alpha) * (m2 + delta * incr)
+
+    data[0] = w_sum
+    data[1] = m1
+    data[2] = m2
+
+
 @myjit
 def _push_vals(data, W, X):
+    if data.shape[0] == 3:
+        _push_vals_order2(data, W, X)
+        return
+
     ns = X.shape[0]
     for s in range(ns):
         _push_val(data, W[s], X[s])
@@ -135,8 +170,41 @@ def _push_stat(data, w, a, v):
     data[2] = v[0] * alpha + one_alpha * (data[2] + delta * incr)
 
 
+@myjit
+def _push_stats_order2(data, W, A, V):
+    """
+    push stats for `order == 2`, with moments held in locals
+
+    Straight-line version of `_push_stat` with no loop over moments.
+    """
+    w_sum = data[0]
+    m1 = data[1]
+    m2 = data[2]
+
+    ns = A.shape[0]
+    for s in range(ns):
+        w = W[s]
+        if w == 0.0:
+            continue
+        w_sum += w
+        alpha = w / w_sum
+        one_alpha = 1.0 - alpha
+        delta = A[s] - m1
+        incr = delta * alpha
+        m1 += incr
+        m2 = V[s, 0] * alpha + one_alpha * (m2 + delta * incr)
+
+    data[0] = w_sum
+    data[1] = m1
+    data[2] = m2
+
+
 @myjit
 def _push_stats(data, W, A, V):
+    if data.shape[0] == 3:
+        _push_stats_order2(data, W, A, V)
+        return
+
     ns = A.shape[0]
     for s in range(ns):
         _push_stat(data, W[s], A[s], V[s, ...])
@@ -149,6 +217,10 @@ def _push_data(data, data_in):
 
 @myjit
 def _push_datas(data, data_in):
+    if data.shape[0] == 3:
+        _push_stats_order2(data, data_in[:, 0], data_in[:, 1], data_in[:, 2:])
+        return
+
     ns = data_in.shape[0]
     for s in range(ns):
         _push_stat(data, data_in[s, 0], data_in[s, 1], data_in[s, 2:])
@@ -159,8 +231,41 @@ def _push_data_scale(data, data_in, scale):
     _push_stat(data, data_in[0] * scale, data_in[1], data_in[2:])
 
 
+@myjit
+def _push_datas_scale_order2(data, data_in, scale):
+    """
+    push scaled data for `order == 2`, with moments held in locals
+
+    `data` is only read and written once, rather than once per sample.
+    """
+    w_sum = data[0]
+    m1 = data[1]
+    m2 = data[2]
+
+    ns = data_in.shape[0]
+    for s in range(ns):
+        w = data_in[s, 0] * scale[s]
+        if w == 0.0:
+            continue
+        w_sum += w
+        alpha = w / w_sum
+        one_alpha = 1.0 - alpha
+        delta = data_in[s, 1] - m1
+        incr = delta * alpha
+        m1 += incr
+        m2 = data_in[s, 2] * alpha + one_alpha * (m2 + delta * incr)
+
+    data[0] = w_sum
+    data[1] = m1
+    data[2] = m2
+
+
 @myjit
 def _push_datas_scale(data, data_in, scale):
+    if data.shape[0] == 3:
+        _push_datas_scale_order2(data, data_in, scale)
+        return
+
     ns = data_in.shape[0]
     for s in range(ns):
         f = scale[s]
@@ -177,10 +282,39 @@ def _push_val_vec(data, w, x):
         _push_val(data[k, :], w[k], x[k])
 
 
+@myjit
+def _push_vals_vec_order2(data, W, X):
+    """
+    push vector values for `order == 2`
+
+    Samples are the outer loop and values the inner loop, so `W[s, :]` and
+    `X[s, :]` are read contiguously. Moments are updated in place in `data`,
+    with no scratch arrays.
+    """
+    ns = X.shape[0]
+    nv = data.shape[0]
+    for s in range(ns):
+        for k in range(nv):
+            w = W[s, k]
+            if w == 0.0:
+                continue
+            wk = data[k, 0] + w
+            alpha = w / wk
+            delta = X[s, k] - data[k, 1]
+            incr = delta * alpha
+            data[k, 0] = wk
+            data[k, 1] += incr
+            data[k, 2] = (1.0 - alpha) * (data[k, 2] + delta * incr)
+
+
 @myjit
 def _push_vals_vec(data, W, X):
     ns = X.shape[0]
     nv = data.shape[0]
+    if data.shape[1] == 3:
+        _push_vals_vec_order2(data, W, X)
+        return
+
     for s in range(ns):
         for k in range(nv):
             _push_val(data[k, :], W[s, k], X[s, k])
@@ -193,11 +327,36 @@ def _push_stat_vec(data, w, a, v):
         _push_stat(data[k, :], w[k], a[k], v[k, :])
 
 
+@myjit
+def _push_stats_vec_order2(data, W, A, V):
+    """push vector stats for `order == 2`.  See `_push_vals_vec_order2`"""
+    ns = A.shape[0]
+    nv = data.shape[0]
+    for s in range(ns):
+        for k in range(nv):
+            w = W[s, k]
+            if w == 0.0:
+                continue
+            wk = data[k, 0] + w
+            alpha = w / wk
+            delta = A[s, k] - data[k, 1]
+            incr = delta * alpha
+            data[k, 0] = wk
+            data[k, 1] += incr
+            data[k, 2] = V[s, k] * alpha + (1.0 - alpha) * (
+                data[k, 2] + delta * incr
+            )
+
+
 @myjit
 def _push_stats_vec(data, W, A, V):
     # V[sample, moment-2, value]
     ns = A.shape[0]
     nv = data.shape[0]
+    if data.shape[1] == 3:
+        _push_stats_vec_order2(data, W, A, V[:, :, 0])
+        return
+
     for s in range(ns):
         for k in range(nv):
             _push_stat(data[k, :], W[s, k], A[s, k], V[s, k, :])
@@ -214,6 +373,12 @@ def _push_data_vec(data, data_in):
 def _push_datas_vec(data, Data_in):
     ns = Data_in.shape[0]
     nv = data.shape[0]
+    if data.shape[1] == 3:
+        _push_stats_vec_order2(
+            data, Data_in[:, :, 0], Data_in[:, :, 1], Data_in[:, :, 2]
+        )
+        return
+
     for s in range(ns):
         for k in range(nv):
             _push_data(data[k, :], Data_in[s, k, :])
@@ -239,10 +404,43 @@ def _push_data_scale_vec(data, data_in, scale):
             _push_data_scale(data[k, :], data_in[k, :], scale)
 
 
+@myjit
+def _push_datas_scale_vec_order2(data, Data_in, scale):
+    """
+    push scaled vector data for `order == 2`.  See `_push_vals_vec_order2`
+
+    Samples with zero frequency (about a third of a bootstrap row) are skipped
+    entirely, rather than pushed with zero weight.
+    """
+    ns = Data_in.shape[0]
+    nv = data.shape[0]
+    for s in range(ns):
+        f = scale[s]
+        if f == 0:
+            continue
+        for k in range(nv):
+            w = Data_in[s, k, 0] * f
+            if w == 0.0:
+                continue
+            wk = data[k, 0] + w
+            alpha = w / wk
+            delta = Data_in[s, k, 1] - data[k, 1]
+            incr = delta * alpha
+            data[k, 0] = wk
+            data[k, 1] += incr
+            data[k, 2] = Data_in[s, k, 2] * alpha + (1.0 - alpha) * (
+                data[k, 2] + delta * incr
+            )
+
+
 @myjit
 def _push_datas_scale_vec(data, Data_in, scale):
     ns = Data_in.shape[0]
     nv = data.shape[0]
+    if data.shape[1] == 3:
+        _push_datas_scale_vec_order2(data, Data_in, scale)
+        return
+
     for s in range(ns):
         f = scale[s]
         if f == 0:
@@ -331,8 +529,85 @@ def _push_val_cov(data, w, x0, x1):
             data[a0, a1] = tmp
 
 
+@myjit
+def _push_cov_order11(w_sum, m0, m1, c, w, x0, x1, c_in):
+    """
+    single update of `order == (1, 1)` comoments (covariance) held in locals
+
+    `c_in` is the covariance of the pushed data (zero for a single value).
+    Zero weight leaves the comoments unchanged, even if the values are not finite.
+    """
+    if w == 0.0:
+        return w_sum, m0, m1, c
+    w_sum += w
+    alpha = w / w_sum
+    delta0 = x0 - m0
+    delta1 = x1 - m1
+    m0 += delta0 * alpha
+    m1 += delta1 * alpha
+    c = c_in * alpha + (1.0 - alpha) * (c + alpha * delta0 * delta1)
+    return w_sum, m0, m1, c
+
+
+@myjit
+def _push_vals_cov_order11(data, W, X0, X1):
+    """push values for `order == (1, 1)`.  See `_push_vals_order2`"""
+    w_sum, m0, m1, c = data[0, 0], data[1, 0], data[0, 1], data[1, 1]
+    ns = X0.shape[0]
+    for s in range(ns):
+        w_sum, m0, m1, c = _push_cov_order11(
+            w_sum, m0, m1, c, W[s], X0[s], X1[s], 0.0
+        )
+    data[0, 0], data[1, 0], data[0, 1], data[1, 1] = w_sum, m0, m1, c
+
+
+@myjit
+def _push_datas_cov_order11(data, datas):
+    """push data for `order == (1, 1)`.  See `_push_vals_order2`"""
+    w_sum, m0, m1, c = data[0, 0], data[1, 0], data[0, 1], data[1, 1]
+    ns = datas.shape[0]
+    for s in range(ns):
+        w_sum, m0, m1, c = _push_cov_order11(
+            w_sum,
+            m0,
+            m1,
+            c,
+            datas[s, 0, 0],
+            datas[s, 1, 0],
+            datas[s, 0, 1],
+            datas[s, 1, 1],
+        )
+    data[0, 0], data[1, 0], data[0, 1], data[1, 1] = w_sum, m0, m1, c
+
+
+@myjit
+def _push_datas_scale_cov_order11(data, datas, scale):
+    """push scaled data for `order == (1, 1)`.  See `_push_vals_order2`"""
+    w_sum, m0, m1, c = data[0, 0], data[1, 0], data[0, 1], data[1, 1]
+    ns = datas.shape[0]
+    for s in range(ns):
+        f = scale[s]
+        if f == 0:
+            continue
+        w_sum, m0, m1, c = _push_cov_order11(
+            w_sum,
+            m0,
+            m1,
+            c,
+            datas[s, 0, 0] * f,
+            datas[s, 1, 0],
+            datas[s, 0, 1],
+            datas[s, 1, 1],
+        )
+    data[0, 0], data[1, 0], data[0, 1], data[1, 1] = w_sum, m0, m1, c
+
+
 @myjit
 def _push_vals_cov(data, W, X1, X2):
+    if data.shape[0] == 2 and data.shape[1] == 2:
+        _push_vals_cov_order11(data, W, X1, X2)
+        return
+
     ns = X1.shape[0]
     for s in range(ns):
         _push_val_cov(data, W[s], X1[s], X2[s])
@@ -434,6 +709,10 @@ def _push_data_cov(data, data_in):
 
 @myjit
 def _push_datas_cov(data, datas):
+    if data.shape[0] == 2 and data.shape[1] == 2:
+        _push_datas_cov_order11(data, datas)
+        return
+
     ns = datas.shape[0]
     for s in range(ns):
         _push_data_scale_cov(data, datas[s], 1.0)
@@ -441,6 +720,10 @@ def _push_datas_cov(data, datas):
 
 @myjit
 def _push_datas_scale_cov(data, datas, scale):
+    if data.shape[0] == 2 and data.shape[1] == 2:
+        _push_datas_scale_cov_order11(data, datas, scale)
+        return
+
     ns = datas.shape[0]
     for s in range(ns):
         f = scale[s]
@@ -514,6 +797,165 @@ def _push_datas_scale_cov_vec(data, Datas, scale):
             _push_data_scale_cov(data[k, ...], Datas[s, k, ...], f)
 
 
+######################################################################
+# Parallel over values
+######################################################################
+# These loop over values in the outer (parallel) loop and samples in the
+# inner loop, so each thread owns a disjoint set of output values.
+
+
+@myjit_parallel
+def _push_vals_vec_parallel(data, W, X):
+    ns = X.shape[0]
+    nv = data.shape[0]
+    for k in prange(nv):
+        if data.shape[1] == 3:
+            _push_vals_order2(data[k, :], W[:, k], X[:, k])
+        else:
+            for s in range(ns):
+                _push_val(data[k, :], W[s, k], X[s, k])
+
+
+@myjit_parallel
+def _push_stats_vec_parallel(data, W, A, V):
+    ns = A.shape[0]
+    nv = data.shape[0]
+    for k in prange(nv):
+        if data.shape[1] == 3:
+            _push_stats_order2(data[k, :], W[:, k], A[:, k], V[:, k, :])
+        else:
+            for s in range(ns):
+                _push_stat(data[k, :], W[s, k], A[s, k], V[s, k, :])
+
+
+@myjit_parallel
+def _push_datas_vec_parallel(data, Data_in):
+    ns = Data_in.shape[0]
+    nv = data.shape[0]
+    for k in prange(nv):
+        if data.shape[1] == 3:
+            _push_stats_order2(
+                data[k, :], Data_in[:, k, 0], Data_in[:, k, 1], Data_in[:, k, 2:]
+            )
+        else:
+            for s in range(ns):
+                _push_data(data[k, :], Data_in[s, k, :])
+
+
+@myjit_parallel
+def _push_vals_cov_vec_parallel(data, W, X0, X1):
+    nv = data.shape[0]
+    for k in prange(nv):
+        _push_vals_cov(data[k, ...], W[:, k], X0[:, k], X1[:, k])
+
+
+@myjit_parallel
+def _push_datas_cov_vec_parallel(data, Datas):
+    nv = data.shape[0]
+    for k in prange(nv):
+        _push_datas_cov(data[k, ...], Datas[:, k, ...])
+
+
+######################################################################
+# Parallel over samples (tree reduction)
+######################################################################
+# Scalar reductions have nothing to partition over but samples.  Samples are
+# split into chunks, each accumulated into a private array, and the partial
+# moments are then combined serially.  The number of chunks does not depend on
+# the number of threads, so results are reproducible.  With fewer than two
+# chunks worth of samples, the serial pusher is used.
+
+# minimum number of samples per chunk
+_TREE_MIN_CHUNK = 1024
+# maximum number of chunks
+_TREE_MAX_NCHUNK = 64
+
+
+@myjit
+def _tree_nchunk(ns):
+    return max(1, min(_TREE_MAX_NCHUNK, ns // _TREE_MIN_CHUNK))
+
+
+@myjit_parallel
+def _push_vals_tree(data, W, X):
+    ns = X.shape[0]
+    if ns < 2 * _TREE_MIN_CHUNK:
+        _push_vals(data, W, X)
+        return
+    nchunk = _tree_nchunk(ns)
+    local = np.zeros((nchunk,) + data.shape, dtype=data.dtype)
+    for t in prange(nchunk):
+        start = t * ns // nchunk
+        end = (t + 1) * ns // nchunk
+        _push_vals(local[t, ...], W[start:end], X[start:end])
+    for t in range(nchunk):
+        _push_data(data, local[t, ...])
+
+
+@myjit_parallel
+def _push_stats_tree(data, W, A, V):
+    ns = A.shape[0]
+    if ns < 2 * _TREE_MIN_CHUNK:
+        _push_stats(data, W, A, V)
+        return
+    nchunk = _tree_nchunk(ns)
+    local = np.zeros((nchunk,) + data.shape, dtype=data.dtype)
+    for t in prange(nchunk):
+        start = t * ns // nchunk
+        end = (t + 1) * ns // nchunk
+        _push_stats(local[t, ...], W[start:end], A[start:end], V[start:end, ...])
+    for t in range(nchunk):
+        _push_data(data, local[t, ...])
+
+
+@myjit_parallel
+def _push_datas_tree(data, data_in):
+    ns = data_in.shape[0]
+    if ns < 2 * _TREE_MIN_CHUNK:
+        _push_datas(data, data_in)
+        return
+    nchunk = _tree_nchunk(ns)
+    local = np.zeros((nchunk,) + data.shape, dtype=data.dtype)
+    for t in prange(nchunk):
+        start = t * ns // nchunk
+        end = (t + 1) * ns // nchunk
+        _push_datas(local[t, ...], data_in[start:end, ...])
+    for t in range(nchunk):
+        _push_data(data, local[t, ...])
+
+
+@myjit_parallel
+def _push_vals_cov_tree(data, W, X0, X1):
+    ns = X0.shape[0]
+    if ns < 2 * _TREE_MIN_CHUNK:
+        _push_vals_cov(data, W, X0, X1)
+        return
+    nchunk = _tree_nchunk(ns)
+    local = np.zeros((nchunk,) + data.shape, dtype=data.dtype)
+    for t in prange(nchunk):
+        start = t * ns // nchunk
+        end = (t + 1) * ns // nchunk
+        _push_vals_cov(local[t, ...], W[start:end], X0[start:end], X1[start:end])
+    for t in range(nchunk):
+        _push_data_cov(data, local[t, ...])
+
+
+@myjit_parallel
+def _push_datas_cov_tree(data, datas):
+    ns = datas.shape[0]
+    if ns < 2 * _TREE_MIN_CHUNK:
+        _push_datas_cov(data, datas)
+        return
+    nchunk = _tree_nchunk(ns)
+    local = np.zeros((nchunk,) + data.shape, dtype=data.dtype)
+    for t in prange(nchunk):
+        start = t * ns // nchunk
+        end = (t + 1) * ns // nchunk
+        _push_datas_cov(local[t, ...], datas[start:end, ...])
+    for t in range(nchunk):
+        _push_data_cov(data, local[t, ...])
+
+
 # named tuple for pushers
 
 
@@ -557,16 +999,53 @@ pusher_cov_vector = Pusher(
 )
 
 
-def factory_pushers(cov=False, vec=False):
+pusher_scalar_parallel = pusher_scalar._replace(
+    vals=_push_vals_tree,
+    stats=_push_stats_tree,
+    datas=_push_datas_tree,
+)
+
+pusher_cov_scalar_parallel = pusher_cov_scalar._replace(
+    vals=_push_vals_cov_tree,
+    datas=_push_datas_cov_tree,
+)
+
+pusher_vector_parallel = pusher_vector._replace(
+    vals=_push_vals_vec_parallel,
+    stats=_push_stats_vec_parallel,
+    datas=_push_datas_vec_parallel,
+)
+
+pusher_cov_vector_parallel = pusher_cov_vector._replace(
+    vals=_push_vals_cov_vec_parallel,
+    datas=_push_datas_cov_vec_parallel,
+)
+
+
+def factory_pushers(cov=False, vec=False, parallel=False):
+    """
+    get pushers
+
+    If `parallel`, vector pushers run in parallel over values, and scalar
+    pushers use a chunked tree reduction over samples.
+    """
     if cov:
         if vec:
+            if parallel:
+                return pusher_cov_vector_parallel
             return pusher_cov_vector
         else:
+            if parallel:
+                return pusher_cov_scalar_parallel
             return pusher_cov_scalar
     else:
         if vec:
+            if parallel:
+                return pusher_vector_parallel
             return pusher_vector
         else:
+            if parallel:
+                return pusher_scalar_parallel
             return pusher_scalar
 
 
@@ -4,10 +4,28 @@ Routines to perform resampling
 from __future__ import absolute_import
 
 import numpy as np
-import xarray as xr
+from numba import prange
 
 from ._resample import factory_resample_data, factory_resample_vals
-from .utils import _axis_expand_broadcast, myjit
+from .utils import (
+    _axis_expand_broadcast,
+    _mom_shape,
+    _prod,
+    _validate_mom,
+    myjit,
+    myjit_parallel,
+)
+
+# `CentralMoments.resample` warns that `resample_and_reduce` should be used
+# instead if the resampled data is both more than `RESAMPLE_WARN_RATIO` times
+# larger than the original data, and more than `RESAMPLE_WARN_NBYTES` bytes
+RESAMPLE_WARN_RATIO = 100
+RESAMPLE_WARN_NBYTES = 2 ** 27
+
+
+class PerformanceWarning(UserWarning):
+    """warning for operations with avoidable memory/performance cost"""
+
 
 ###############################################################################
 # resampling
@@ -25,18 +43,66 @@ def _randsamp_freq_out(freq):
             freq[i, index] += 1
 
 
-@myjit
+@myjit_parallel
 def _randsamp_freq_indices(indices, freq):
-    assert freq.shape == indices.shape
+    # rows are independent, so parallelize over replicates
     nrep, ndat = freq.shape
-    for r in range(nrep):
+    for r in prange(nrep):
         for d in range(ndat):
             idx = indices[r, d]
             freq[r, idx] += 1
 
 
+@myjit
+def _min_max(x):
+    """min and max of 2d array in a single pass"""
+    lo = hi = x[0, 0]
+    for i in range(x.shape[0]):
+        for j in range(x.shape[1]):
+            v = x[i, j]
+            if v < lo:
+                lo = v
+            elif v > hi:
+                hi = v
+    return lo, hi
+
+
+def _freq_dtype(ndat):
+    """smallest of int32/int64 holding counts and indices for `ndat` samples"""
+    return np.int32 if ndat < 2 ** 31 else np.int64
+
+
+def _asarray_int(x, order=None):
+    """convert to int32 or int64 array, keeping either if already present"""
+    x = np.asarray(x, order=order)
+    if x.dtype != np.int32 and x.dtype != np.int64:
+        x = x.astype(np.int64)
+    return x
+
+
+def _zeros_out(shape, out=None):
+    """zeroed frequency array of `shape`, or `out` zeroed in place"""
+    if out is None:
+        return np.zeros(shape, dtype=_freq_dtype(shape[1]))
+    if out.shape != shape:
+        raise ValueError("out has wrong shape {} != {}".format(out.shape, shape))
+    # counts go up to the number of samples
+    if not np.issubdtype(out.dtype, np.integer) or np.iinfo(out.dtype).max < shape[1]:
+        raise ValueError(
+            "out dtype {} cannot hold counts up to {}".format(out.dtype, shape[1])
+        )
+    out.fill(0)
+    return out
+
+
 def randsamp_freq(
-    nrep=None, size=None, indices=None, transpose=False, freq=None, check=False
+    nrep=None,
+    size=None,
+    indices=None,
+    transpose=False,
+    freq=None,
+    check=False,
+    out=None,
 ):
     """
     produce a random sample for bootstrapping
@@ -63,18 +129,26 @@ def randsamp_freq(
     transpose : bool
         see output
     check : bool, default=False
-        if `check` is `True`, then check `freq` and `indices` against `size` and `nrep`
+        if `check` is `True`, then check `freq` and `indices` against `size` and `nrep`,
+        and that `indices` are in range `[0, size)`.
+    out : ndarray, shape=(nrep, size), optional
+        if passed, fill this array with the frequency table built from `indices` or
+        `nrep` and `size`, instead of allocating a new array.  Any integer dtype
+        that can hold counts up to `size` may be used.  Cannot be combined with
+        `freq`.
 
     Returns
     -------
     output : frequency table
         if not transpose: output.shape == (nrep, size)
         if tranpose, output.shae = (size, nrep)
+        New tables are int32 (int64 if `size >= 2**31`).
+        If `out` is passed, returns `out` (`out.T` if `transpose`).
 
     """
 
     def _array_check(x, name=""):
-        x = np.asarray(x, dtype=np.int64)
+        x = _asarray_int(x)
         if check:
             if nrep is not None:
                 if x.shape[0] != nrep:
@@ -86,15 +160,21 @@ def randsamp_freq(
         return x
 
     if freq is not None:
+        if out is not None:
+            raise ValueError("out cannot be used with freq")
         freq = _array_check(freq, "freq")
 
     elif indices is not None:
         indices = _array_check(indices, "indices")
-        freq = np.zeros(indices.shape, dtype=np.int64)
+        if check and indices.size > 0:
+            lo, hi = _min_max(indices)
+            if lo < 0 or hi >= indices.shape[1]:
+                raise ValueError("indices out of range")
+        freq = _zeros_out(indices.shape, out)
         _randsamp_freq_indices(indices, freq)
 
     elif nrep is not None and size is not None:
-        freq = np.zeros((nrep, size), dtype=np.int64)
+        freq = _zeros_out((nrep, size), out)
         _randsamp_freq_out(freq)
 
     else:
@@ -141,12 +221,12 @@ def resample_data(
         the shape of data less axis, and mom is the shape of the resulting mom.
     """
 
-    if isinstance(mom, int):
-        mom = (mom,)
+    mom, _ = _validate_mom(mom)
 
     # check inputs
     data = np.asarray(data, dtype=dtype, order=order)
-    freq = np.asarray(freq, dtype=np.int64, order=order)
+    # kernels loop over replicates, then samples, so keep freq rows contiguous
+    freq = _asarray_int(freq, order="c")
 
     if dtype is None:
         dtype = data.dtype
@@ -161,24 +241,26 @@ def resample_data(
         data = np.moveaxis(data, axis, 0)
 
     shape = data.shape[1 : -len(mom)]
-    mom_shape = tuple(x + 1 for x in mom)
+    mom_shape = _mom_shape(mom)
 
     assert data.shape == (ndat,) + shape + mom_shape
 
     # output
+    # np.zeros gets zeroed pages from the allocator, so only fill a passed `out`
     out_shape = (nrep,) + data.shape[1:]
     if out is None:
-        out = np.empty(out_shape, dtype=dtype)
+        out = np.zeros(out_shape, dtype=dtype)
     else:
         assert out.shape == out_shape
         # make sure out is in correct order
         out = np.asarray(out, dtype=dtype, order="c")
+        out.fill(0.0)
 
     # resahpe
     if shape == ():
         meta_reshape = ()
     else:
-        meta_reshape = (np.prod(shape),)
+        meta_reshape = (_prod(shape),)
 
     data_reshape = (ndat,) + meta_reshape + mom_shape
     out_reshape = (nrep,) + meta_reshape + mom_shape
@@ -190,7 +272,6 @@ def resample_data(
         cov=len(mom) > 1, vec=len(shape) > 0, parallel=parallel
     )
 
-    outr.fill(0.0)
     resample(datar, freq, outr)
 
     return outr.reshape(out.shape)
@@ -213,14 +294,8 @@ def resample_vals(
     resample data according to frequency table
     """
 
-    if isinstance(mom, int):
-        mom = (mom,) * 1
-    assert isinstance(mom, tuple)
-
-    if mom_ndim is None:
-        mom_ndim = len(mom)
-    assert len(mom) == mom_ndim
-    mom_shape = tuple(x + 1 for x in mom)
+    mom, mom_ndim = _validate_mom(mom, mom_ndim)
+    mom_shape = _mom_shape(mom)
 
     if mom_ndim == 1:
         y = None
@@ -232,14 +307,16 @@ def resample_vals(
     cov = y is not None
 
     # check input data
-    freq = np.asarray(freq, dtype=np.int64)
+    # kernels loop over replicates, then samples, so keep freq rows contiguous
+    freq = _asarray_int(freq, order="c")
     nrep, ndat = freq.shape
 
     x = np.asarray(x, dtype=dtype, order=order)
     if dtype is None:
         dtype = x.dtype
     if w is None:
-        w = np.ones_like(x)
+        # broadcast view, so unit weights are not materialized
+        w = np.broadcast_to(np.ones((), dtype=x.dtype), x.shape)
     else:
         w = _axis_expand_broadcast(
             w, x.shape, axis, roll=False, dtype=dtype, order=order
@@ -262,16 +339,17 @@ def resample_vals(
     shape = x.shape[1:]
     out_shape = (nrep,) + shape + mom_shape
     if out is None:
-        out = np.empty(out_shape, dtype=dtype)
+        out = np.zeros(out_shape, dtype=dtype)
     else:
         assert out.shape == out_shape
         out = np.asarray(out, dtype=dtype, order="c")
+        out.fill(0.0)
 
     # reshape
     if shape == ():
         meta_reshape = ()
     else:
-        meta_reshape = (np.prod(shape),)
+        meta_reshape = (_prod(shape),)
     data_reshape = (ndat,) + meta_reshape
     out_reshape = (nrep,) + meta_reshape + mom_shape
 
@@ -282,7 +360,6 @@ def resample_vals(
         yr = y.reshape(data_reshape)
 
     resample = factory_resample_vals(cov=cov, vec=len(shape) > 0, parallel=parallel)
-    outr.fill(0.0)
     if cov:
         resample(wr, xr, yr, freq, outr)
     else:
@@ -387,6 +464,7 @@ def xbootstrap_confidence_interval(
         If `None`, use default names
         If string, use this for the 'values' name
     """
+    import xarray as xr
 
     if dim is not None:
         axis = x.get_axis_num(dim)
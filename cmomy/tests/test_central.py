@@ -37,6 +37,23 @@ def test_mom_ndim():
         central.CentralMoments(np.zeros((4, 4)), mom_ndim=3)
 
 
+def test_zeros_mom():
+    for mom, mom_ndim, shape in [
+        (3, None, (4,)),
+        ((3,), None, (4,)),
+        ([3, 2], None, (4, 3)),
+        (3, 2, (4, 4)),
+    ]:
+        s = central.CentralMoments.zeros(mom=mom, mom_ndim=mom_ndim, val_shape=2)
+        assert s.shape == (2,) + shape
+
+    with pytest.raises(AssertionError):
+        central.CentralMoments.zeros(mom=(3, 3), mom_ndim=1)
+
+    with pytest.raises(ValueError):
+        central.CentralMoments.zeros(mom=(3, 0))
+
+
 def test_data_ndim():
     with pytest.raises(ValueError):
         central.CentralMoments(np.zeros(4), mom_ndim=2)
@@ -73,13 +90,154 @@ def test_create(other):
     other.test_values(t.values)
 
 
-def test_from_vals(other):
+@pytest.mark.parametrize("parallel", [True, False])
+def test_from_vals(other, parallel):
     t = other.cls.from_vals(
-        x=other.x, w=other.w, axis=other.axis, mom=other.mom, broadcast=other.broadcast
+        x=other.x,
+        w=other.w,
+        axis=other.axis,
+        mom=other.mom,
+        broadcast=other.broadcast,
+        parallel=parallel,
     )
     other.test_values(t.values)
 
 
+@pytest.mark.parametrize("parallel", [True, False])
+@pytest.mark.parametrize("val_shape", [(), (3,)])
+@pytest.mark.parametrize("bad", [np.nan, np.inf])
+def test_push_zero_weight_nonfinite(bad, val_shape, parallel):
+    # zero weight samples must not contribute, even if they are not finite
+    shape = (4,) + val_shape
+
+    def _expand(a):
+        a = np.array(a).reshape((4,) + (1,) * len(val_shape))
+        return np.broadcast_to(a, shape).copy()
+
+    x = _expand([1.0, 2.0, bad, 3.0])
+    w = _expand([1.0, 1.0, 0.0, 1.0])
+    keep = np.array([True, True, False, True])
+
+    expected = central.CentralMoments.from_vals(x[keep], w=w[keep], mom=2)
+    t = central.CentralMoments.from_vals(x, w=w, mom=2, parallel=parallel)
+    np.testing.assert_allclose(t.values, expected.values)
+
+    # zero weight data
+    datas = np.stack([w, x, np.zeros(shape)], axis=-1)
+    t = central.CentralMoments.from_datas(datas, mom=2, parallel=parallel)
+    np.testing.assert_allclose(t.values, expected.values)
+
+    # zero frequency when resampling
+    datas = np.stack([np.ones(shape), x, np.zeros(shape)], axis=-1)
+    freq = np.array([[1, 2, 0, 1]])
+    t = central.resample_data(datas, freq, mom=2, parallel=parallel)
+    expected = central.resample_data(datas[keep], freq[:, keep], mom=2)
+    np.testing.assert_allclose(t, expected)
+
+    # covariance
+    y = _expand([0.5, 1.0, bad, 2.0])
+    expected = central.CentralMoments.from_vals(
+        (x[keep], y[keep]), w=w[keep], mom=(1, 1)
+    )
+    t = central.CentralMoments.from_vals((x, y), w=w, mom=(1, 1), parallel=parallel)
+    np.testing.assert_allclose(t.values, expected.values)
+
+    datas = np.zeros(shape + (2, 2))
+    datas[..., 0, 0] = w
+    datas[..., 1, 0] = x
+    datas[..., 0, 1] = y
+    t = central.CentralMoments.from_datas(datas, mom=(1, 1), parallel=parallel)
+    np.testing.assert_allclose(t.values, expected.values)
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+@pytest.mark.parametrize("val_shape", [(), (3,)])
+def test_push_vals_mom2(val_shape, parallel):
+    x = np.random.rand(*(50,) + val_shape)
+    w = np.random.rand(*(50,) + val_shape)
+
+    t = central.CentralMoments.from_vals(x, w=w, mom=2, parallel=parallel)
+
+    xave = np.average(x, weights=w, axis=0)
+    np.testing.assert_allclose(t.values[..., 0], w.sum(axis=0))
+    np.testing.assert_allclose(t.values[..., 1], xave)
+    np.testing.assert_allclose(
+        t.values[..., 2], np.average((x - xave) ** 2, weights=w, axis=0)
+    )
+
+    # against general order update
+    t4 = central.CentralMoments.from_vals(x, w=w, mom=4)
+    np.testing.assert_allclose(t.values, t4.values[..., :3])
+
+    # datas and stats
+    datas = central.CentralMoments.from_vals(
+        x.reshape((10, 5) + val_shape), w=w.reshape((10, 5) + val_shape), mom=2, axis=1
+    ).values
+    t1 = central.CentralMoments.from_datas(datas, mom=2, parallel=parallel)
+    np.testing.assert_allclose(t.values, t1.values)
+
+    t1 = t.zeros_like().push_stats(
+        a=datas[..., 1], v=datas[..., 2:], w=datas[..., 0], parallel=parallel
+    )
+    np.testing.assert_allclose(t.values, t1.values)
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+@pytest.mark.parametrize("val_shape", [(), (3,)])
+def test_push_vals_cov11(val_shape, parallel):
+    shape = (50,) + val_shape
+    x = (np.random.rand(*shape), np.random.rand(*shape))
+    w = np.random.rand(*shape)
+
+    # against general order update
+    t = central.CentralMoments.from_vals(x, w=w, mom=(1, 1), parallel=parallel)
+    t2 = central.CentralMoments.from_vals(x, w=w, mom=(2, 2))
+    np.testing.assert_allclose(t.values, t2.values[..., :2, :2])
+
+    datas = central.CentralMoments.from_vals(
+        tuple(_.reshape((10, 5) + val_shape) for _ in x),
+        w=w.reshape((10, 5) + val_shape),
+        mom=(1, 1),
+        axis=1,
+    ).values
+    t1 = central.CentralMoments.from_datas(datas, mom=(1, 1), parallel=parallel)
+    np.testing.assert_allclose(t.values, t1.values)
+
+    freq = central.randsamp_freq(nrep=4, size=10)
+    r = central.CentralMoments(datas, mom_ndim=2).resample_and_reduce(freq=freq)
+    r2 = central.CentralMoments.from_vals(
+        tuple(_.reshape((10, 5) + val_shape) for _ in x),
+        w=w.reshape((10, 5) + val_shape),
+        mom=(2, 2),
+        axis=1,
+    ).resample_and_reduce(freq=freq)
+    np.testing.assert_allclose(r.values, r2.values[..., :2, :2])
+
+
+@pytest.mark.parametrize("mom", [3, (2, 2)])
+# small inputs use the serial pusher, large inputs split into several chunks
+@pytest.mark.parametrize("n", [100, 5000])
+def test_push_parallel_scalar(mom, n):
+    w = np.random.rand(n)
+    if isinstance(mom, int):
+        x = np.random.rand(n)
+        xb = x.reshape(-1, 2)
+    else:
+        x = (np.random.rand(n), np.random.rand(n))
+        xb = tuple(_.reshape(-1, 2) for _ in x)
+
+    t0 = central.CentralMoments.from_vals(x, w=w, mom=mom)
+    t1 = central.CentralMoments.from_vals(x, w=w, mom=mom, parallel=True)
+    np.testing.assert_allclose(t0.values, t1.values)
+
+    # moments of blocks of two samples
+    datas = central.CentralMoments.from_vals(
+        xb, w=w.reshape(-1, 2), mom=mom, axis=1
+    ).values
+    t2 = central.CentralMoments.from_datas(datas, mom=mom, parallel=True)
+    np.testing.assert_allclose(t0.values, t2.values)
+
+
 def test_push_val(other):
     if other.axis == 0 and other.style == "total":
         t = other.s.zeros_like()
@@ -109,10 +267,11 @@ def test_from_datas(other):
     other.test_values(t.values)
 
 
-def test_push_datas(other):
+@pytest.mark.parametrize("parallel", [True, False])
+def test_push_datas(other, parallel):
     datas = np.array([s.values for s in other.S])
     t = other.s.zeros_like()
-    t.push_datas(datas)
+    t.push_datas(datas, parallel=parallel)
     other.test_values(t.values)
 
 
@@ -135,7 +294,8 @@ def test_from_stat(other):
         other.test_values(t.values)
 
 
-def test_from_stats(other):
+@pytest.mark.parametrize("parallel", [True, False])
+def test_from_stats(other, parallel):
     if other.s.mom_ndim == 1:
         t = other.s.zeros_like()
         t.push_stats(
@@ -143,6 +303,7 @@ def test_from_stats(other):
             v=np.array([s.values[..., 2:] for s in other.S]),
             w=np.array([s.weight() for s in other.S]),
             axis=0,
+            parallel=parallel,
         )
         other.test_values(t.values)
 
@@ -178,6 +339,12 @@ def test_isub(other):
     np.testing.assert_allclose(t.values, other.S[0].values)
 
 
+def test_sub_zero_weight(other):
+    # subtracting everything leaves zero total weight
+    with pytest.raises(ZeroDivisionError):
+        other.s - other.s
+
+
 def test_mult(other):
     s = other.s
 
@@ -230,3 +397,55 @@ def test_moveaxis(other):
             f = np.moveaxis(other.data_test, axis, 0)
 
             np.testing.assert_allclose(t.data, f)
+
+            # negative axes
+            t = other.s.moveaxis(axis - ndim, -ndim)
+            np.testing.assert_allclose(t.data, f)
+
+        with pytest.raises(np.AxisError):
+            other.s.moveaxis(ndim, 0)
+
+
+def test_float32(other):
+    s32 = other.s.astype(np.float32)
+    assert s32.dtype == np.float32
+    np.testing.assert_allclose(s32.data, other.data_test, rtol=1e-5, atol=1e-6)
+
+    if other.s.val_ndim > 0:
+        t = s32.reduce(axis=0)
+        assert t.dtype == np.float32
+        np.testing.assert_allclose(
+            t.data, other.s.reduce(axis=0).data, rtol=1e-4, atol=1e-6
+        )
+
+        # accumulate in float64
+        assert s32.reduce(axis=0, dtype=np.float64).dtype == np.float64
+
+        freq = central.randsamp_freq(nrep=5, size=other.s.val_shape[0])
+        t = other.s.resample_and_reduce(freq=freq, dtype=np.float32)
+        assert t.dtype == np.float32
+        np.testing.assert_allclose(
+            t.data,
+            other.s.resample_and_reduce(freq=freq).data,
+            rtol=1e-4,
+            atol=1e-6,
+        )
+
+
+def test_zero(other):
+    t = other.s.zeros_like()
+    np.testing.assert_allclose(t.zero().data, 0.0)
+
+    t.push_vals(other.x, w=other.w, axis=other.axis, broadcast=other.broadcast)
+    other.test_values(t.data)
+    np.testing.assert_allclose(t.zero().data, 0.0)
+
+    # direct modification of data
+    t.data[...] = 1.0
+    np.testing.assert_allclose(t.zero().data, 0.0)
+
+    # modification through a reference taken before zeroing
+    data = t.data
+    t.zero()
+    data[...] = 1.0
+    np.testing.assert_allclose(t.zero().data, 0.0)
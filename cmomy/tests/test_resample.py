@@ -1,8 +1,14 @@
+import warnings
+
 import numpy as np
 import pytest
 
 import cmomy.central as central
+import cmomy.resample as resample
+from cmomy._resample import _RESAMPLE_BLOCK_BYTES, _RESAMPLE_MIN_BLOCK, _block_size
 from cmomy.resample import (  # , xbootstrap_confidence_interval
+    RESAMPLE_WARN_RATIO,
+    PerformanceWarning,
     bootstrap_confidence_interval,
 )
 
@@ -78,7 +84,7 @@ def test_resample_data(other, parallel):
 
 
 @pytest.mark.parametrize("parallel", [True, False])
-def test_resample_against_vals(other, parallel):
+def test_resample_against_vals(other, parallel, monkeypatch):
 
     nrep = 10
 
@@ -95,6 +101,151 @@ def test_resample_against_vals(other, parallel):
 
             np.testing.assert_allclose(t0.values, t1.values)
 
+            t2 = s.resample(idx, axis=axis, reduce=True, parallel=parallel)
+            np.testing.assert_allclose(t0.values, t2.values)
+
+            # small intermediate, so no warning
+            idx = np.zeros((RESAMPLE_WARN_RATIO + 1, ndat), dtype=int)
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", PerformanceWarning)
+                s.resample(idx, axis=axis)
+
+            monkeypatch.setattr(central, "RESAMPLE_WARN_NBYTES", 0)
+            with pytest.warns(PerformanceWarning) as record:
+                s.resample(idx, axis=axis)
+            assert record[0].filename == __file__
+            monkeypatch.undo()
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+@pytest.mark.parametrize("val_shape", [(20,), (20, 3)])
+def test_resample_data_mom2(val_shape, parallel):
+    data = np.random.rand(*val_shape + (3,))
+    s = central.CentralMoments.from_data(data, mom_ndim=1)
+
+    idx = np.random.choice(20, (10, 20), replace=True)
+    t0 = s.resample_and_reduce(indices=idx, axis=0, parallel=parallel)
+    t1 = s.resample(idx, axis=0).reduce(1)
+
+    np.testing.assert_allclose(t0.values, t1.values)
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+@pytest.mark.parametrize("mom", [2, 3])
+def test_resample_blocked(mom, parallel):
+    # large enough that resample kernels process samples in several blocks
+    x = np.random.rand(400, 100)
+    idx = np.random.choice(400, (5, 400), replace=True)
+    freq = central.randsamp_freq(indices=idx)
+
+    s = central.CentralMoments.from_vals(x.reshape(400, 1, 100), mom=mom, axis=1)
+    t0 = s.resample_and_reduce(freq=freq, axis=0, parallel=parallel)
+    t1 = s.resample(idx, axis=0).reduce(1)
+    np.testing.assert_allclose(t0.values, t1.values)
+
+    t2 = central.CentralMoments.from_resample_vals(
+        x, freq=freq, mom=mom, axis=0, parallel=parallel
+    )
+    np.testing.assert_allclose(t0.values, t2.values)
+
+
+
+def test_block_size():
+    assert _block_size(8) == _RESAMPLE_BLOCK_BYTES // 8
+    # samples larger than the block budget still go in blocks of several samples
+    assert _block_size(10 * _RESAMPLE_BLOCK_BYTES) == _RESAMPLE_MIN_BLOCK
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_resample_vals_ill_conditioned(parallel):
+    # values with a small spread about a large offset, and one outlier
+    rng = np.random.RandomState(0)
+    x = 1e4 + rng.normal(scale=1e-2, size=2000)
+    x[0] = 1e6
+    freq = central.randsamp_freq(nrep=20, size=len(x))
+
+    out = resample.resample_vals(x, freq, mom=4, parallel=parallel)
+
+    xl = x.astype(np.longdouble)
+    for f, o in zip(freq, out):
+        wsum = f.sum()
+        mean = (f * xl).sum() / wsum
+        expected = [wsum, mean] + [
+            (f * (xl - mean) ** n).sum() / wsum for n in range(2, 5)
+        ]
+        np.testing.assert_allclose(o, np.array(expected, dtype=float), rtol=1e-6)
+
+
+@pytest.mark.parametrize("val_shape", [(), (3,)])
+def test_resample_vals_unweighted(val_shape):
+    x = np.random.rand(*(20,) + val_shape)
+    freq = central.randsamp_freq(nrep=5, size=20)
+
+    a = central.resample_vals(x, freq=freq, mom=3, axis=0)
+    b = central.resample_vals(x, freq=freq, mom=3, axis=0, w=np.ones_like(x))
+    np.testing.assert_allclose(a, b)
+
+
+def test_randsamp_freq_dtype():
+    assert central.randsamp_freq(nrep=5, size=10).dtype == np.int32
+    idx = np.random.choice(10, (5, 10), replace=True)
+    assert central.randsamp_freq(indices=idx).dtype == np.int32
+
+    x = np.random.rand(10, 3)
+    data = central.CentralMoments.from_vals(x[:, None], mom=3, axis=1).data
+    freq = central.randsamp_freq(indices=idx)
+    expected = central.resample_vals(x, freq=freq, mom=3, axis=0)
+
+    for dtype in [np.int32, np.int64]:
+        f = freq.astype(dtype)
+        # int32 and int64 tables are used without conversion
+        assert resample._asarray_int(f, order="c") is f
+        assert central.randsamp_freq(freq=f) is f
+        np.testing.assert_allclose(
+            central.resample_vals(x, freq=f, mom=3, axis=0), expected
+        )
+        np.testing.assert_allclose(
+            central.resample_data(data, freq=f, mom=3, axis=0), expected
+        )
+
+def test_randsamp_freq_check():
+    idx = np.random.choice(5, (3, 5), replace=True)
+    freq = central.randsamp_freq(indices=idx, size=5, check=True)
+    np.testing.assert_equal(freq.sum(axis=1), 5)
+
+    for bad in [-1, 5]:
+        idx[1, 2] = bad
+        with pytest.raises(ValueError):
+            central.randsamp_freq(indices=idx, size=5, check=True)
+
+
+def test_randsamp_freq_out():
+    idx = np.random.choice(10, (5, 10), replace=True)
+    freq = central.randsamp_freq(indices=idx)
+
+    out = np.full((5, 10), 7, dtype=np.int32)
+    f = central.randsamp_freq(indices=idx, out=out)
+    assert f is out
+    np.testing.assert_array_equal(out, freq)
+
+    f = central.randsamp_freq(nrep=5, size=10, out=out)
+    assert f is out
+    np.testing.assert_array_equal(out.sum(axis=1), 10)
+
+    f = central.randsamp_freq(indices=idx, out=out, transpose=True)
+    assert f.base is out
+    np.testing.assert_array_equal(f, freq.T)
+
+    # counts up to 300 do not fit in int8
+    with pytest.raises(ValueError):
+        central.randsamp_freq(nrep=2, size=300, out=np.empty((2, 300), dtype=np.int8))
+    with pytest.raises(ValueError):
+        central.randsamp_freq(nrep=5, size=10, out=np.empty((5, 10)))
+    with pytest.raises(ValueError):
+        central.randsamp_freq(freq=freq, out=out)
+
+    with pytest.raises(ValueError):
+        central.randsamp_freq(nrep=5, size=9, out=out)
+
 
 def test_bootstrap_stats(other):
 
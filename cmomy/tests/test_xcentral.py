@@ -3,6 +3,7 @@ import random
 import numpy as np
 import xarray as xr
 
+import cmomy
 import cmomy.xcentral as xcentral
 
 # specific xcentral stuff
@@ -235,3 +236,9 @@ def test_resample_and_reduce(other):
             # reduce
             tx = tx.reduce(dim)
             xtest(t1.values, tx.values)
+
+
+def test_lazy_xcentral_attribute(monkeypatch):
+    # remove the attribute set on import, so access goes through __getattr__
+    monkeypatch.delattr(cmomy, "xcentral")
+    assert cmomy.xcentral is xcentral
@@ -3,21 +3,36 @@ from __future__ import absolute_import
 from functools import lru_cache
 
 import numpy as np
-import xarray as xr
 from numba import njit
 
 # from .cached_decorators import gcached  # , cached_clear
 from .options import OPTIONS
 
 
+def _jit_kws(**kws):
+    """
+    default options to `numba.njit`
+
+    The default (python) error model is kept, so that pushing data which leaves
+    a zero total weight (e.g. `s - s`) raises `ZeroDivisionError`.
+    """
+    return dict(fastmath=OPTIONS["fastmath"], cache=OPTIONS["cache"], **kws)
+
+
 def myjit(func):
     """
     "my" jit function
     uses option inline='always', fastmath=True
     """
-    return njit(inline="always", fastmath=OPTIONS["fastmath"], cache=OPTIONS["cache"])(
-        func
-    )
+    return njit(**_jit_kws(inline="always"))(func)
+
+
+def myjit_parallel(func):
+    """
+    "my" jit function for parallel loops
+    uses option parallel=True, fastmath=True
+    """
+    return njit(**_jit_kws(parallel=True))(func)
 
 
 # from scipy.special import binom
@@ -71,6 +86,67 @@ def _shape_insert_axis(shape, axis, new_size):
     return tuple(shape)
 
 
+@lru_cache(maxsize=32)
+def _wrap_axes(axes, ndim):
+    """
+    wrap tuple of integer axes to positive values
+
+    Uses a single modulo per axis rather than branching on sign.
+    """
+    for axis in axes:
+        if not -ndim <= axis < ndim:
+            raise np.AxisError(axis, ndim)
+    return tuple(int(axis) % ndim for axis in axes)
+
+
+@lru_cache(maxsize=64)
+def _validate_mom_cached(mom, mom_ndim):
+    if type(mom) is int:
+        if mom_ndim is None:
+            mom_ndim = 1
+        mom = (mom,) * mom_ndim
+    elif mom_ndim is None:
+        mom_ndim = len(mom)
+
+    assert len(mom) == mom_ndim
+    if min(mom) <= 0:
+        raise ValueError("moments must be positive")
+    return mom, mom_ndim
+
+
+def _validate_mom(mom, mom_ndim=None):
+    """
+    normalize `mom` (int or sequence) to tuple of moments
+
+    Returns
+    -------
+    mom : tuple
+    mom_ndim : int
+    """
+    t = type(mom)
+    if t is not int and t is not tuple:
+        mom = int(mom) if isinstance(mom, int) else tuple(mom)
+    return _validate_mom_cached(mom, mom_ndim)
+
+
+def _mom_shape(mom):
+    """shape of moment dimensions, i.e., `tuple(m + 1 for m in mom)`"""
+    n = len(mom)
+    if n == 1:
+        return (mom[0] + 1,)
+    elif n == 2:
+        return (mom[0] + 1, mom[1] + 1)
+    return tuple(m + 1 for m in mom)
+
+
+def _prod(shape):
+    """size of `shape`, without the overhead of `np.prod` on a short tuple"""
+    n = 1
+    for s in shape:
+        n *= s
+    return n
+
+
 def _shape_reduce(shape, axis):
     """given input shape, give shape after reducing along axis"""
     shape = list(shape)
@@ -113,52 +189,22 @@ def _axis_expand_broadcast(
     return x
 
 
-@lru_cache(maxsize=5)
-def _cached_ones(shape, dtype=None):
-    return np.ones(shape, dtype=dtype)
-
-
-def _xr_wrap_like(da, x):
-    """
-    wrap x with xarray like da
+def _asarray_c(x, dtype=None):
     """
-    x = np.asarray(x)
-    assert x.shape == da.shape
-
-    return xr.DataArray(
-        x, dims=da.dims, coords=da.coords, name=da.name, indexes=da.indexes
-    )
+    convert x to c-contiguous array
 
-
-def _xr_order_like(template, *others):
-    """
-    given dimensions, order in same manner
+    if `x` is already a c-contiguous ndarray of the requested dtype, return it
+    without a call to `np.asarray`.
     """
+    if (
+        type(x) is np.ndarray
+        and x.flags.c_contiguous
+        and (dtype is None or x.dtype == dtype)
+    ):
+        return x
+    return np.asarray(x, dtype=dtype, order="c")
 
-    if not isinstance(template, xr.DataArray):
-        out = others
 
-    else:
-        dims = template.dims
-
-        key_map = {dim: i for i, dim in enumerate(dims)}
-
-        def key(x):
-            return key_map[x]
-
-        out = []
-        for other in others:
-            if isinstance(other, xr.DataArray):
-                # reorder
-                order = sorted(other.dims, key=key)
-
-                x = other.transpose(*order)
-            else:
-                x = other
-
-            out.append(x)
-
-    if len(out) == 1:
-        out = out[0]
-
-    return out
+@lru_cache(maxsize=5)
+def _cached_ones(shape, dtype=None):
+    return np.ones(shape, dtype=dtype)
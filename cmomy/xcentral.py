@@ -8,7 +8,70 @@ import xarray as xr
 
 from . import central
 from .cached_decorators import gcached
-from .utils import _xr_order_like  # , _xr_wrap_like
+from .utils import _asarray_c, _mom_shape
+
+
+def _xr_wrap_like(da, x):
+    """
+    wrap x with xarray like da
+    """
+    x = np.asarray(x)
+    assert x.shape == da.shape
+
+    return xr.DataArray(
+        x, dims=da.dims, coords=da.coords, name=da.name, indexes=da.indexes
+    )
+
+
+def _xr_order_like(template, *others):
+    """
+    given dimensions, order in same manner
+    """
+    if not isinstance(template, xr.DataArray):
+        out = others
+
+    else:
+        dims = template.dims
+
+        key_map = {dim: i for i, dim in enumerate(dims)}
+
+        def key(x):
+            return key_map[x]
+
+        out = []
+        for other in others:
+            if isinstance(other, xr.DataArray):
+                # reorder
+                order = sorted(other.dims, key=key)
+
+                x = other.transpose(*order)
+            else:
+                x = other
+
+            out.append(x)
+
+    if len(out) == 1:
+        out = out[0]
+
+    return out
+
+
+# default moment dimensions
+_DEFAULT_MOM_DIMS = {1: ("mom_0",), 2: ("mom_0", "mom_1")}
+
+
+def _validate_mom_dims(mom_dims, mom_ndim):
+    """convert mom_dims to tuple of length mom_ndim, with defaults"""
+    if type(mom_dims) is tuple:
+        pass
+    elif mom_dims is None:
+        return _DEFAULT_MOM_DIMS[mom_ndim]
+    elif isinstance(mom_dims, str):
+        mom_dims = (mom_dims,)
+    else:
+        mom_dims = tuple(mom_dims)
+    assert len(mom_dims) == mom_ndim
+    return mom_dims
 
 
 ###############################################################################
@@ -28,11 +91,7 @@ def _xcentral_moments(
     if isinstance(mom, tuple):
         mom = mom[0]
 
-    if mom_dims is None:
-        mom_dims = ("mom_0",)
-    if isinstance(mom_dims, str):
-        mom_dims = (mom_dims,)
-    assert len(mom_dims) == 1
+    mom_dims = _validate_mom_dims(mom_dims, 1)
 
     if w is None:
         w = xr.ones_like(x)
@@ -104,9 +163,7 @@ def _xcentral_comoments(
     else:
         dim = axis
 
-    if mom_dims is None:
-        mom_dims = ["mom_0", "mom_1"]
-    assert len(mom_dims) == 2
+    mom_dims = _validate_mom_dims(mom_dims, 2)
 
     wsum = w.sum(dim=dim)
     wsum_inv = 1.0 / wsum
@@ -273,12 +330,7 @@ def _optional_wrap_data(
             dims_total = dims
 
         elif len(dims) == ndim - mom_ndim:
-            if mom_dims is None:
-                mom_dims = tuple(f"mom_{i}" for i in range(mom_ndim))
-            elif isinstance(mom_dims, str):
-                mom_dims = (mom_dims,)
-            else:
-                mom_dims = tuple(mom_dims)
+            mom_dims = _validate_mom_dims(mom_dims, mom_ndim)
 
             dims_total = dims + mom_dims
         else:
@@ -302,7 +354,7 @@ def _optional_wrap_data(
             raise ValueError(f"last dimensions {data.dims} do not match {mom_dims}")
 
     if verify:
-        vals = np.asarray(data.values, dtype=dtype, order="c")
+        vals = _asarray_c(data.values, dtype=dtype)
     else:
         vals = data.values
 
@@ -927,6 +979,13 @@ class xCentralMoments(central.CentralMoments):
                 axis=axis, default=default, ndim=ndim
             )
 
+    def _wrap_axes(self, axes, ndim=None):
+        axes = tuple(
+            self._xdata.get_axis_num(axis) if isinstance(axis, str) else axis
+            for axis in axes
+        )
+        return super(xCentralMoments, self)._wrap_axes(axes=axes, ndim=ndim)
+
     @classmethod
     def from_data(
         cls,
@@ -982,7 +1041,7 @@ class xCentralMoments(central.CentralMoments):
                 val_shape = data_verified.shape[:-mom_ndim]
             mom = cls._check_mom(mom, mom_ndim, data_verified.shape)
 
-            if data_verified.shape != val_shape + tuple(x + 1 for x in mom):
+            if data_verified.shape != val_shape + _mom_shape(mom):
                 raise ValueError(
                     f"{data.shape} does not conform to {val_shape} and {mom}"
                 )